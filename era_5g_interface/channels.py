@@ -1,21 +1,42 @@
+import copy
 import logging
 import os
+import struct
 import sys
+import threading
 import time
-from abc import ABC
+import weakref
+from abc import ABC, abstractmethod
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum, unique
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple, Union, cast
 
 import cv2
 import numpy as np
+import orjson
 import socketio
-import ujson
-from lz4.frame import compress, decompress
+from lz4.block import compress, decompress
 
 from era_5g_interface.exceptions import BackPressureException, UnknownChannelTypeUsed
 from era_5g_interface.h264_decoder import H264Decoder, H264DecoderError
 from era_5g_interface.h264_encoder import H264Encoder, H264EncoderError
+from era_5g_interface.utils.orjson_module import OPTIONS as ORJSON_OPTIONS
+
+try:
+    # Optional libjpeg-turbo based JPEG codec, OpenCV is used as a fallback.
+    import simplejpeg
+except ImportError:  # pragma: no cover
+    simplejpeg = None
+
+try:
+    # Optional Zstandard codec for ChannelType.JSON_ZSTD.
+    from zstandard import ZstdCompressor, ZstdDecompressor
+
+    ZSTANDARD_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    ZSTANDARD_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +49,16 @@ COMMAND_EVENT = str("command")
 COMMAND_ERROR_EVENT = str("command_error")
 COMMAND_RESULT_EVENT = str("command_result")
 
+# ChannelType.H264_BIN image header: timestamp, width, height, flags and metadata size. The header is followed by
+# the orjson serialized metadata and by the encoded frame data.
+IMAGE_HEADER = struct.Struct("<QIIII")
+IMAGE_HEADER_KEY_FRAME_FLAG = 1
+
+# Suffix of the event used for batched image data (list of image data) sent by send_image with image_batch_size > 1.
+IMAGE_BATCH_EVENT_SUFFIX = str("_batch")
+# Max time in seconds the image batch flusher thread waits before it checks whether the Channels object still exists.
+IMAGE_BATCH_FLUSHER_IDLE_TIMEOUT = 1.0
+
 
 @unique
 class ChannelType(Enum):
@@ -37,6 +68,78 @@ class ChannelType(Enum):
     JPEG = 2
     H264 = 3
     JSON_LZ4 = 4
+    H264_BIN = 5
+    JSON_ZSTD = 6
+
+
+class DecodedFrame(NamedTuple):
+    """Decoded image data passed to image channel callbacks.
+
+    For compatibility with the dict used in older versions, fields can also be read by name: data["frame"],
+    "metadata" in data and data.get("metadata"). An unset (None) metadata behaves like a missing dict key. Only this
+    read access is supported, DecodedFrame is still a tuple: iteration and unpacking yield the field values, not the
+    keys, and there are no keys(), values() or items() methods or item assignment.
+    """
+
+    frame: np.ndarray
+    timestamp: int
+    metadata: Optional[Dict[str, Any]] = None
+
+    def __getitem__(self, key: Union[str, int, slice]) -> Any:  # type: ignore[override]
+        """Dict style field access by name, tuple indexing otherwise.
+
+        Args:
+            key (Union[str, int, slice]): Field name or tuple index.
+
+        Returns:
+            Field value.
+
+        Raises:
+            KeyError: Unknown or unset (None) field name.
+        """
+
+        if isinstance(key, str):
+            value = getattr(self, key, None) if key in self._fields else None
+            if value is None:
+                raise KeyError(key)
+            return value
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        """Dict style check whether the field is set (not None).
+
+        Args:
+            key (object): Field name, other values are never contained.
+
+        Returns:
+            True if the field name is known and the field is set.
+        """
+
+        return isinstance(key, str) and key in self._fields and getattr(self, key) is not None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict style get.
+
+        Args:
+            key (str): Field name.
+            default (Any): Value returned for unknown or unset (None) field.
+
+        Returns:
+            Field value or default.
+        """
+
+        value = getattr(self, key, None) if key in self._fields else None
+        return default if value is None else value
+
+
+class _ImageData(NamedTuple):
+    """Received image data unpacked from the dict or ChannelType.H264_BIN payload, before the frame is decoded."""
+
+    frame: Any  # Encoded frame, bytes or memoryview of the received payload.
+    timestamp: int
+    metadata: Optional[Dict[str, Any]]
+    width: Optional[int]
+    height: Optional[int]
 
 
 @dataclass
@@ -44,7 +147,7 @@ class CallbackInfoClient:
     """Callback info dataclass used on client side."""
 
     type: ChannelType
-    callback: Callable[[Dict], None]  # Custom callback with dict.
+    callback: Callable[[Union[Dict, DecodedFrame]], None]  # Custom callback with dict (JSON) or DecodedFrame (images).
     error_event: str = DATA_ERROR_EVENT  # Custom error event name.
 
 
@@ -53,7 +156,8 @@ class CallbackInfoServer:
     """Callback info dataclass used on server side - callback has namespace sid parameter."""
 
     type: ChannelType
-    callback: Callable[[str, Dict], None]  # Custom callback with sid and dict.
+    # Custom callback with sid and dict (JSON) or DecodedFrame (image channels).
+    callback: Callable[[str, Union[Dict, DecodedFrame]], None]
     error_event: str = DATA_ERROR_EVENT  # Custom error event name.
 
 
@@ -61,7 +165,8 @@ class Channels(ABC):
     """Channels class is used to define channel data callbacks and contains send functions.
 
     It handles image frames JPEG and H.264 encoding/decoding. Data is sent via the DATA_NAMESPACE. The class cannot be
-    used alone. The ServerChannels and ClientChannels classes create callbacks and encoders/decoders.
+    used alone. The ServerChannels and ClientChannels classes create callbacks and encoders/decoders and implement
+    the Socketio Client or Server specific sending.
     """
 
     # This should work roughly like an abstract member.
@@ -74,6 +179,11 @@ class Channels(ABC):
         back_pressure_size: Optional[int] = 5,
         recreate_h264_attempts_count: int = 5,
         stats: bool = False,
+        stats_window: Optional[int] = None,
+        jpeg_quality: int = 95,
+        h264_codec: str = "h264",
+        image_batch_size: int = 1,
+        image_batch_timeout: float = 0.01,
     ):
         """Constructor.
 
@@ -84,43 +194,118 @@ class Channels(ABC):
             back_pressure_size (int, optional): Back pressure size - max size of eio.queue.qsize().
             recreate_h264_attempts_count (int): How many times try to recreate the H.264 encoder/decoder.
             stats (bool): Store output data sizes.
+            stats_window (int, optional): Max number of stored (latest) output data sizes, sizes are stored in
+                a bounded collections.deque then. Default None stores all sizes in a list.
+            jpeg_quality (int): ChannelType.JPEG quality (0-100), default: 95.
+            h264_codec (str): FFmpeg H.264 encoder used for sending, e.g. "h264" (libx264) or "h264_nvenc" (NVIDIA
+                GPU encoder), default: "h264". The encoded stream is standard H.264, the receiving side is the same.
+            image_batch_size (int): Max number of droppable (non-key) frames sent by send_image in one message, which
+                is emitted on the event name with IMAGE_BATCH_EVENT_SUFFIX, default: 1 (no batching).
+            image_batch_timeout (float): Max time in seconds a frame waits in an unfinished batch, default: 0.01.
         """
 
         self._sio = sio
 
         if back_pressure_size is not None and back_pressure_size < 1:
             raise ValueError("Invalid value for back_pressure_size.")
+        if image_batch_size < 1:
+            raise ValueError("Invalid value for image_batch_size.")
 
         self._back_pressure_size = back_pressure_size
         self._recreate_h264_attempts_count = recreate_h264_attempts_count
         self._stats = stats
+        self._jpeg_quality = jpeg_quality
+        self._h264_codec = h264_codec
         if self._stats:
-            self._sizes: List[int] = []
+            self._sizes: Union[List[int], Deque[int]] = [] if stats_window is None else deque(maxlen=stats_window)
 
         self._callbacks_info = callbacks_info
         # For multiple H.264 streams, the encoders and the decoders are indexed by Tuple(eio_sid, event).
         self._decoders: Dict[Tuple[str, str], H264Decoder] = dict()
         self._encoders: Dict[Tuple[str, str], H264Encoder] = dict()
 
+        self._image_batch_size = image_batch_size
+        self._image_batch_timeout = image_batch_timeout
+        # Unfinished image batches and their flush deadlines (with wait_for_reconnection) are indexed by
+        # Tuple(sid, event). Unfinished batches are sent after image_batch_timeout by one flusher thread, which is
+        # started with the first batch. _image_batches_lock only guards the dictionaries, the per event send lock is
+        # held while a batch is emitted, so batches of one event are sent in order without blocking other events.
+        self._image_batches: Dict[Tuple[Optional[str], str], List[Union[Dict[str, Any], bytes]]] = dict()
+        self._image_batch_deadlines: Dict[Tuple[Optional[str], str], Tuple[float, bool]] = dict()
+        self._image_batch_send_locks: Dict[str, threading.Lock] = dict()
+        self._image_batches_lock = threading.Lock()
+        self._image_batches_condition = threading.Condition(self._image_batches_lock)
+        self._image_batch_flusher: Optional[threading.Thread] = None
+        self._image_batches_closed = False
+
+        # Zstandard contexts are reused for all JSON_ZSTD data, they are not thread safe, so they are used under locks.
+        self._zstd_compressor: Optional[Any] = None
+        self._zstd_decompressor: Optional[Any] = None
+        if ZSTANDARD_AVAILABLE:
+            self._zstd_compressor = ZstdCompressor(level=1)
+            self._zstd_decompressor = ZstdDecompressor()
+        elif any(cb_info.type is ChannelType.JSON_ZSTD for cb_info in callbacks_info.values()):
+            raise RuntimeError("The zstandard package is required for ChannelType.JSON_ZSTD.")
+        self._zstd_compressor_lock = threading.Lock()
+        self._zstd_decompressor_lock = threading.Lock()
+
+        # The channel type of a received event is fixed by callbacks_info, so the unpack and frame decode functions
+        # are selected once here and image_decode does not branch on the channel type per frame.
+        self._image_decode_impl: Dict[
+            str, Callable[[Union[Dict[str, Any], bytes], str, Optional[str]], Optional[DecodedFrame]]
+        ] = dict()
+        for event, cb_info in callbacks_info.items():
+            if cb_info.type is ChannelType.JPEG:
+                self._image_decode_impl[event] = partial(
+                    self._image_decode, self._unpack_image_dict, self._decode_jpeg_frame
+                )
+            elif cb_info.type is ChannelType.H264:
+                self._image_decode_impl[event] = partial(
+                    self._image_decode, self._unpack_image_dict, self._decode_h264_frame
+                )
+            elif cb_info.type is ChannelType.H264_BIN:
+                self._image_decode_impl[event] = partial(
+                    self._image_decode, self._unpack_image_bin, self._decode_h264_frame
+                )
+
     @staticmethod
     def _shutdown(cb_type: str, event: str) -> None:
         logger.error(f"Unhandled exception in {cb_type} callback (event: {event}).", exc_info=sys.exc_info())
         logging.shutdown()  # should flush the logger
         os._exit(1)  # standard sys.exit() is not enough
 
+    @abstractmethod
     def _apply_back_pressure(self, sid: Optional[str] = None) -> None:
-        """Apply back pressure."""
+        """Apply back pressure.
 
-        if self._back_pressure_size is not None:
-            if isinstance(self._sio, socketio.Client):
-                if self._sio.eio.queue.qsize() > self._back_pressure_size:
-                    raise BackPressureException()
-            else:
-                if sid is None:
-                    raise ValueError("'sid' has to be set for server.")
-                eio_sid = self.get_client_eio_sid(str(sid), DATA_NAMESPACE)
-                if self._sio.eio.sockets[eio_sid].queue.qsize() > self._back_pressure_size:
-                    raise BackPressureException()
+        Args:
+            sid (str, optional): Namespace sid - mandatory on the server side.
+
+        Raises:
+            BackPressureException: If the output queue size exceeds back_pressure_size.
+        """
+
+        pass
+
+    @abstractmethod
+    def _emit(
+        self,
+        event: str,
+        data: Union[Dict[str, Any], bytes, List[Union[Dict[str, Any], bytes]]],
+        sid: Optional[str] = None,
+        wait_for_reconnection: bool = True,
+    ) -> None:
+        """Emit data via DATA_NAMESPACE.
+
+        Args:
+            event (str): Event name.
+            data (Union[Dict[str, Any], bytes, List[Union[Dict[str, Any], bytes]]]): JSON data, binary payload or
+                image batch.
+            sid (str, optional): Namespace sid - mandatory when sending from the server side to the client.
+            wait_for_reconnection (bool): Wait for reconnection to server side? Wait is blocking.
+        """
+
+        pass
 
     def send_image(
         self,
@@ -136,75 +321,243 @@ class Channels(ABC):
     ) -> None:
         """Send general image data with JPEG or H.264 encoding via DATA_NAMESPACE.
 
+        ChannelType.H264_BIN sends H.264 frame as a single binary payload with an IMAGE_HEADER instead of a dict.
+
         NOTE: DATA_NAMESPACE is assumed to be a connected namespace.
 
         Args:
             frame (np.ndarray): Video frame / image.
             event (str): Event name.
-            channel_type (ChannelType): Encoding type - ChannelType.JPEG or ChannelType.H264.
+            channel_type (ChannelType): Encoding type - ChannelType.JPEG, ChannelType.H264 or ChannelType.H264_BIN.
             timestamp (int): Frame timestamp.
             metadata (Dict[str, Any], optional): Optional metadata to send.
             sid (str, optional): Namespace sid - mandatory when sending from the server side to the client.
             can_be_dropped (bool): If data can be lost due to back pressure.
             wait_for_reconnection (bool): Wait for reconnection to server side? Wait is blocking.
-            encoding_options (Dict[str, str], optional): ChannelType.H264 options, e.g. {"crf": "0", "preset":
-                "ultrafast", "tune": "zerolatency", "x264-params": "keyint=5"}, default: {"preset": "ultrafast",
-                "tune": "zerolatency"}.
+            encoding_options (Dict[str, str], optional): ChannelType.H264 and ChannelType.H264_BIN options, e.g.
+                {"crf": "0", "preset": "ultrafast", "tune": "zerolatency", "x264-params": "keyint=5"}, default:
+                {"preset": "ultrafast", "tune": "zerolatency"} (see DEFAULT_OPTIONS in h264_encoder for h264_codec).
 
         Parameter frame.shape should not be changed after first send_image function call.
         Parameters encoding_options and frame.shape are only used in the first send_image call to create the encoder.
         """
 
-        if channel_type is not ChannelType.JPEG and channel_type is not ChannelType.H264:
+        if channel_type not in (ChannelType.JPEG, ChannelType.H264, ChannelType.H264_BIN):
             raise UnknownChannelTypeUsed()
 
         if timestamp is None:
             timestamp = time.perf_counter_ns()
-        data: Dict[str, Any] = {"timestamp": timestamp}
-        if metadata:
-            data["metadata"] = metadata
         eio_sid = self.get_client_eio_sid(sid, DATA_NAMESPACE)
         encoder_id = (eio_sid, event)
-        if channel_type is ChannelType.H264:
-            if encoder_id not in self._encoders:
+        # Local references, the dictionaries are not searched again in the rest of this (per frame) function.
+        encoder: Optional[H264Encoder] = None
+        if channel_type is not ChannelType.JPEG:
+            encoder = self._encoders.get(encoder_id)
+            if encoder is None:
                 try:
-                    logger.info(f"Creating H.264 encoder for image size {frame.shape[1]}x{frame.shape[0]}")
-                    self._encoders[encoder_id] = H264Encoder(frame.shape[1], frame.shape[0], options=encoding_options)
+                    logger.info(
+                        f"Creating H.264 encoder ({self._h264_codec}) for image size {frame.shape[1]}x{frame.shape[0]}"
+                    )
+                    encoder = H264Encoder(
+                        frame.shape[1], frame.shape[0], options=encoding_options, codec=self._h264_codec
+                    )
+                    self._encoders[encoder_id] = encoder
                 except Exception as e:
                     logger.error(f"Cannot create H.264 encoder: {repr(e)}")
                     raise e
         try:
             is_key_frame = False
-            if channel_type is ChannelType.H264:
-                frame_encoded = self._encoders[encoder_id].encode_ndarray(frame)
-                # TODO: dataclass for this data
-                data["h264"] = True
-                data["width"] = self._encoders[encoder_id].width()
-                data["height"] = self._encoders[encoder_id].height()
-                is_key_frame = self._encoders[encoder_id].last_frame_is_keyframe()
+            if encoder is not None:
+                frame_encoded = encoder.encode_ndarray(frame)
+                is_key_frame = encoder.last_frame_is_keyframe()
+            elif simplejpeg is not None and frame.dtype == np.uint8 and frame.ndim == 3 and frame.shape[2] == 3:
+                # libjpeg-turbo SIMD encoder, returns bytes directly (no intermediate ndarray).
+                frame_encoded = simplejpeg.encode_jpeg(
+                    np.ascontiguousarray(frame), quality=self._jpeg_quality, colorspace="BGR", fastdct=True
+                )
             else:
-                _, frame_jpeg = cv2.imencode(".jpg", frame)
+                _, frame_jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self._jpeg_quality])
                 frame_encoded = frame_jpeg.tobytes()
-            data["frame"] = frame_encoded
             if self._stats:
                 # TODO: include all data size
-                self._sizes.append(len(frame_encoded))
-                logger.debug(f"Frame data size: {self._sizes[-1]}")
-            self.send_data(
+                frame_size = len(frame_encoded)
+                self._sizes.append(frame_size)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Frame data size: %d", frame_size)
+            data: Union[Dict[str, Any], bytes]
+            if channel_type is ChannelType.H264_BIN and encoder is not None:
+                metadata_encoded = orjson.dumps(metadata, option=ORJSON_OPTIONS) if metadata else b""
+                data = (
+                    IMAGE_HEADER.pack(
+                        timestamp,
+                        encoder.width(),
+                        encoder.height(),
+                        IMAGE_HEADER_KEY_FRAME_FLAG if is_key_frame else 0,
+                        len(metadata_encoded),
+                    )
+                    + metadata_encoded
+                    + frame_encoded
+                )
+            else:
+                # TODO: dataclass for this data
+                data = {"timestamp": timestamp, "frame": frame_encoded}
+                if metadata:
+                    data["metadata"] = metadata
+                if encoder is not None:
+                    data["h264"] = True
+                    data["width"] = encoder.width()
+                    data["height"] = encoder.height()
+            can_be_dropped = can_be_dropped and not is_key_frame
+            if self._image_batch_size > 1:
+                if can_be_dropped:
+                    if metadata and isinstance(data, dict):
+                        # Batched data is serialized on flush, the caller may reuse or modify metadata meanwhile.
+                        data["metadata"] = copy.deepcopy(metadata)
+                    self._batch_image(data, event, sid, wait_for_reconnection)
+                    return
+                # Frames batched before this frame are sent first. The batch can be dropped due to back pressure,
+                # this frame (e.g. a key frame the following frames depend on) is sent anyway.
+                try:
+                    self.flush_image_batch(event, sid, wait_for_reconnection)
+                except BackPressureException:
+                    logger.debug(f"Image batch for event '{event}' dropped due to back pressure.")
+            self._send(
                 data,
                 event,
                 sid=sid,
-                can_be_dropped=(can_be_dropped and not is_key_frame),
+                can_be_dropped=can_be_dropped,
+                wait_for_reconnection=wait_for_reconnection,
             )
         except H264EncoderError as e:
             logger.error(f"H.264 encoder error: {e}")
+            assert encoder is not None
             # Try to recreate encoder
-            if self._encoders[encoder_id].get_init_count() < self._recreate_h264_attempts_count:
-                logger.info(f"Try to recreate encoder ... attempt {self._encoders[encoder_id].get_init_count()}")
-                self._encoders[encoder_id].encoder_init()
+            if encoder.get_init_count() < self._recreate_h264_attempts_count:
+                logger.info(f"Try to recreate encoder ... attempt {encoder.get_init_count()}")
+                encoder.encoder_init()
             else:
                 raise e
 
+    def _batch_image(
+        self, data: Union[Dict[str, Any], bytes], event: str, sid: Optional[str], wait_for_reconnection: bool
+    ) -> None:
+        """Add image data to the batch, the batch is sent when it is full or after image_batch_timeout.
+
+        Args:
+            data (Union[Dict[str, Any], bytes]): Image data.
+            event (str): Event name.
+            sid (str, optional): Namespace sid - mandatory when sending from the server side to the client.
+            wait_for_reconnection (bool): Wait for reconnection to server side? Wait is blocking.
+        """
+
+        batch_id = (sid, event)
+        with self._image_batches_condition:
+            batch = self._image_batches.setdefault(batch_id, [])
+            batch.append(data)
+            batch_full = len(batch) >= self._image_batch_size
+            if not batch_full and batch_id not in self._image_batch_deadlines:
+                self._image_batch_deadlines[batch_id] = (
+                    time.monotonic() + self._image_batch_timeout,
+                    wait_for_reconnection,
+                )
+                if self._image_batch_flusher is None and not self._image_batches_closed:
+                    self._image_batch_flusher = threading.Thread(
+                        target=Channels._flush_image_batches_on_timeout,
+                        args=(weakref.ref(self),),
+                        name="image_batch_flusher",
+                        daemon=True,
+                    )
+                    self._image_batch_flusher.start()
+                self._image_batches_condition.notify()
+        if batch_full:
+            self.flush_image_batch(event, sid, wait_for_reconnection)
+
+    @staticmethod
+    def _flush_image_batches_on_timeout(channels_ref: "weakref.ReferenceType[Channels]") -> None:
+        """Send unfinished batches after image_batch_timeout (flusher thread).
+
+        The thread holds the Channels object only through a weak reference, it ends after close() or when the object
+        is garbage collected. Errors are only logged, there is no caller to handle them.
+
+        Args:
+            channels_ref (weakref.ReferenceType[Channels]): Weak reference to the Channels object.
+        """
+
+        channels = channels_ref()
+        if channels is None:
+            return
+        condition = channels._image_batches_condition
+        del channels
+        while True:
+            with condition:
+                channels = channels_ref()
+                if channels is None or channels._image_batches_closed:
+                    return
+                now = time.monotonic()
+                expired = [
+                    (batch_id, wait_for_reconnection)
+                    for batch_id, (deadline, wait_for_reconnection) in channels._image_batch_deadlines.items()
+                    if deadline <= now
+                ]
+                if not expired:
+                    next_deadline = min(
+                        (deadline for deadline, _ in channels._image_batch_deadlines.values()),
+                        default=now + IMAGE_BATCH_FLUSHER_IDLE_TIMEOUT,
+                    )
+                    # The Channels object is not kept alive while waiting.
+                    del channels
+                    condition.wait(min(next_deadline - now, IMAGE_BATCH_FLUSHER_IDLE_TIMEOUT))
+                    continue
+            for (sid, event), wait_for_reconnection in expired:
+                try:
+                    channels.flush_image_batch(event, sid, wait_for_reconnection)
+                except BackPressureException:
+                    logger.debug(f"Image batch for event '{event}' dropped due to back pressure.")
+                except Exception as e:
+                    logger.error(f"Failed to send image batch for event '{event}': {repr(e)}")
+
+    def close(self) -> None:
+        """Stop the image batch flusher thread.
+
+        Unfinished image batches are no longer sent after image_batch_timeout, full batches and flush_image_batch
+        still work. Call flush_image_batch before close to send the unfinished batches.
+        """
+
+        with self._image_batches_condition:
+            self._image_batches_closed = True
+            self._image_batches_condition.notify_all()
+            flusher = self._image_batch_flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join()
+
+    def flush_image_batch(self, event: str, sid: Optional[str] = None, wait_for_reconnection: bool = True) -> None:
+        """Send batched image data immediately (used only with image_batch_size > 1).
+
+        Args:
+            event (str): Event name.
+            sid (str, optional): Namespace sid - mandatory when sending from the server side to the client.
+            wait_for_reconnection (bool): Wait for reconnection to server side? Wait is blocking.
+
+        Raises:
+            BackPressureException: The batch is dropped due to back pressure.
+        """
+
+        batch_id = (sid, event)
+        with self._image_batches_lock:
+            send_lock = self._image_batch_send_locks.setdefault(event, threading.Lock())
+        with send_lock:
+            with self._image_batches_lock:
+                self._image_batch_deadlines.pop(batch_id, None)
+                batch = self._image_batches.pop(batch_id, None)
+            if batch:
+                self._send(
+                    batch,
+                    event + IMAGE_BATCH_EVENT_SUFFIX,
+                    sid=sid,
+                    can_be_dropped=True,
+                    wait_for_reconnection=wait_for_reconnection,
+                )
+
     def send_data(
         self,
         data: Dict[str, Any],
@@ -221,37 +574,54 @@ class Channels(ABC):
         Args:
             data (Dict[str, Any]): JSON data.
             event (str): Event name.
-            channel_type (ChannelType): ChannelType.JSON for raw JSON or ChannelType.JSON_LZ4 for LZ4 compressed JSON.
+            channel_type (ChannelType): ChannelType.JSON for raw JSON, ChannelType.JSON_LZ4 for LZ4 compressed JSON or
+                ChannelType.JSON_ZSTD for Zstandard compressed JSON (better ratio for larger data, requires zstandard).
             sid (str, optional): Namespace sid - mandatory when sending from the server side to the client.
             can_be_dropped (bool): If data can be lost due to back pressure.
             wait_for_reconnection (bool): Wait for reconnection to server side? Wait is blocking.
         """
 
-        if channel_type is not ChannelType.JSON and channel_type is not ChannelType.JSON_LZ4:
+        if channel_type not in (ChannelType.JSON, ChannelType.JSON_LZ4, ChannelType.JSON_ZSTD):
             raise UnknownChannelTypeUsed()
 
-        if can_be_dropped:
+        new_data: Union[Dict[str, Any], bytes] = data
+        if channel_type is ChannelType.JSON_LZ4:
+            # LZ4 block (no frame header and no per-call context setup), uncompressed size is stored in the block.
+            new_data = compress(orjson.dumps(data, option=ORJSON_OPTIONS), mode="fast", acceleration=1, store_size=True)
+        elif channel_type is ChannelType.JSON_ZSTD:
+            if self._zstd_compressor is None:
+                raise RuntimeError("The zstandard package is required for ChannelType.JSON_ZSTD.")
+            data_encoded = orjson.dumps(data, option=ORJSON_OPTIONS)
+            with self._zstd_compressor_lock:
+                new_data = self._zstd_compressor.compress(data_encoded)
+
+        self._send(new_data, event, sid, can_be_dropped, wait_for_reconnection)
+
+    def _send(
+        self,
+        data: Union[Dict[str, Any], bytes, List[Union[Dict[str, Any], bytes]]],
+        event: str,
+        sid: Optional[str] = None,
+        can_be_dropped: bool = False,
+        wait_for_reconnection: bool = True,
+    ) -> None:
+        """Emit already encoded data via DATA_NAMESPACE.
+
+        Args:
+            data (Union[Dict[str, Any], bytes, List[Union[Dict[str, Any], bytes]]]): JSON data, binary payload or
+                image batch.
+            event (str): Event name.
+            sid (str, optional): Namespace sid - mandatory when sending from the server side to the client.
+            can_be_dropped (bool): If data can be lost due to back pressure.
+            wait_for_reconnection (bool): Wait for reconnection to server side? Wait is blocking.
+        """
+
+        if can_be_dropped and self._back_pressure_size is not None:
             self._apply_back_pressure(sid)
 
-        new_data = data
-        if channel_type is ChannelType.JSON_LZ4:
-            new_data = compress(bytes(ujson.dumps(data), "utf-8"))
-
-        if isinstance(self._sio, socketio.Client):
-            if wait_for_reconnection:
-                while not self._sio.connected or not self._sio.eio.state:
-                    logger.info("Waiting for reconnection ...")
-                    if not self._sio._reconnect_task or not self._sio._reconnect_task.is_alive():
-                        break
-                    time.sleep(1)
-            self._sio.emit(event, new_data, namespace=DATA_NAMESPACE)
-        else:
-            if sid is None:
-                raise ValueError("'sid' has to be set for server.")
-            if not self._sio.manager.is_connected(sid, DATA_NAMESPACE):
-                raise ConnectionError(f"Client with {DATA_NAMESPACE} sid {sid} is not connected to server.")
-            self._sio.emit(event, new_data, namespace=DATA_NAMESPACE, to=sid)
+        self._emit(event, data, sid, wait_for_reconnection)
 
+    @abstractmethod
     def get_client_eio_sid(self, sid: Optional[str] = None, namespace: Optional[str] = None) -> str:
         """Get client eio sid.
 
@@ -263,12 +633,7 @@ class Channels(ABC):
             Client eio sid.
         """
 
-        if isinstance(self._sio, socketio.Client):
-            return str(self._sio.sid)
-        else:
-            if sid is None:
-                raise ValueError("'sid' has to be set for server.")
-            return str(self._sio.manager.eio_sid_from_sid(sid, namespace))
+        pass
 
     def data_error_callback(self, data: Dict[str, Any], sid: Optional[str] = None) -> None:
         """Allows to receive general error data on DATA_NAMESPACE.
@@ -280,15 +645,67 @@ class Channels(ABC):
 
         logger.error(f"Data error, eio_sid {self.get_client_eio_sid(sid, DATA_NAMESPACE)}, sid {sid}, data {data}")
 
-    def image_decode(self, data: Dict[str, Any], event: str, sid: Optional[str] = None) -> Optional[Dict]:
+    def image_decode(
+        self, data: Union[Dict[str, Any], bytes], event: str, sid: Optional[str] = None
+    ) -> Optional[DecodedFrame]:
         """Decode JPEG or H.264 encoded image received on DATA_NAMESPACE.
 
         Args:
-            data (Dict[str, Any]): Received dictionary with frame data.
+            data (Union[Dict[str, Any], bytes]): Received dictionary with frame data or ChannelType.H264_BIN payload.
             event (str): Event name.
             sid (str, optional): Namespace sid - only on the server side.
+
+        Returns:
+            Decoded frame with timestamp and metadata or None on error.
+        """
+
+        return self._image_decode_impl[event](data, event, sid)
+
+    def _image_decode(
+        self,
+        unpack: Callable[[Union[Dict[str, Any], bytes], str, Optional[str]], Optional[_ImageData]],
+        decode_frame: Callable[[_ImageData, str, str, Optional[str]], Optional[np.ndarray]],
+        data: Union[Dict[str, Any], bytes],
+        event: str,
+        sid: Optional[str] = None,
+    ) -> Optional[DecodedFrame]:
+        """Decode image with the unpack and frame decode functions selected for the event channel type.
+
+        Args:
+            unpack (Callable): Function which unpacks the received data to _ImageData.
+            decode_frame (Callable): Function which decodes the unpacked frame.
+            data (Union[Dict[str, Any], bytes]): Received dictionary with frame data or ChannelType.H264_BIN payload.
+            event (str): Event name.
+            sid (str, optional): Namespace sid - only on the server side.
+
+        Returns:
+            Decoded frame with timestamp and metadata or None on error.
         """
 
+        error_event = self._callbacks_info[event].error_event
+        image_data = unpack(data, error_event, sid)
+        if image_data is None:
+            return None
+        frame_decoded = decode_frame(image_data, event, error_event, sid)
+        if frame_decoded is None:
+            return None
+        return DecodedFrame(frame_decoded, image_data.timestamp, image_data.metadata)
+
+    def _unpack_image_dict(
+        self, data: Union[Dict[str, Any], bytes], error_event: str, sid: Optional[str] = None
+    ) -> Optional[_ImageData]:
+        """Unpack received ChannelType.JPEG or ChannelType.H264 dictionary.
+
+        Args:
+            data (Union[Dict[str, Any], bytes]): Received dictionary with frame data.
+            error_event (str): Error event name.
+            sid (str, optional): Namespace sid - only on the server side.
+
+        Returns:
+            Unpacked image data or None on error.
+        """
+
+        data = cast(Dict[str, Any], data)
         if "timestamp" in data:
             timestamp = data["timestamp"]
         else:
@@ -299,88 +716,161 @@ class Channels(ABC):
             logger.error("Data does not contain frame.")
             self.send_data(
                 {"timestamp": timestamp, "error": "Data does not contain frame."},
-                self._callbacks_info[event].error_event,
+                error_event,
                 sid=sid,
             )
             return None
+        return _ImageData(data["frame"], timestamp, data.get("metadata"), data.get("width"), data.get("height"))
 
-        eio_sid = self.get_client_eio_sid(sid, DATA_NAMESPACE)
-        decoder_id = (eio_sid, event)
-        if self._callbacks_info[event].type is ChannelType.H264 and decoder_id not in self._decoders:
-            if "width" not in data or "height" not in data:
-                logger.error("Data does not contain width or height, it is mandatory for H.264.")
-                self.send_data(
-                    {
-                        "timestamp": timestamp,
-                        "error": "Data does not contain width or height, it is mandatory for H.264.",
-                    },
-                    self._callbacks_info[event].error_event,
-                    sid=sid,
-                )
-                return None
+    def _unpack_image_bin(
+        self, data: Union[Dict[str, Any], bytes], error_event: str, sid: Optional[str] = None
+    ) -> Optional[_ImageData]:
+        """Unpack received ChannelType.H264_BIN payload.
+
+        Args:
+            data (Union[Dict[str, Any], bytes]): Received ChannelType.H264_BIN payload.
+            error_event (str): Error event name.
+            sid (str, optional): Namespace sid - only on the server side.
+
+        Returns:
+            Unpacked image data or None on error.
+        """
+
+        if not isinstance(data, bytes) or len(data) < IMAGE_HEADER.size:
+            logger.error("Data does not contain image header.")
+            self.send_data(
+                {"timestamp": 0, "error": "Data does not contain image header."},
+                error_event,
+                sid=sid,
+            )
+            return None
+        timestamp, width, height, _, metadata_size = IMAGE_HEADER.unpack_from(data, 0)
+        frame_offset = IMAGE_HEADER.size + metadata_size
+        # Slicing the memoryview does not copy the (possibly multi-MB) frame data.
+        payload = memoryview(data)
+        metadata: Optional[Dict[str, Any]] = None
+        if metadata_size:
             try:
-                logger.info(f"Creating H.264 decoder for image size {data['width']}x{data['height']}")
-                self._decoders[decoder_id] = H264Decoder(data["width"], data["height"])
-            except Exception as e:
-                logger.error(f"Cannot create H.264 decoder: {repr(e)}")
+                metadata = orjson.loads(payload[IMAGE_HEADER.size : frame_offset])
+            except orjson.JSONDecodeError as e:
+                logger.error(f"Failed to decode metadata: {repr(e)}")
                 self.send_data(
-                    {"timestamp": timestamp, "error": f"Cannot create H.264 decoder: {repr(e)}"},
-                    self._callbacks_info[event].error_event,
+                    {"timestamp": timestamp, "error": f"Failed to decode metadata: {repr(e)}"},
+                    error_event,
                     sid=sid,
                 )
                 return None
+        return _ImageData(payload[frame_offset:], timestamp, metadata, width, height)
 
-        if decoder_id in self._decoders:
-            last_timestamp = self._decoders[decoder_id].last_timestamp
-            if timestamp - last_timestamp < 0:
-                logger.error(
-                    f"Received frame with older timestamp: {timestamp}, "
-                    f"last_timestamp: {last_timestamp}, diff: {timestamp - last_timestamp}"
-                )
+    def _decode_h264_frame(
+        self, image_data: _ImageData, event: str, error_event: str, sid: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        """Decode H.264 frame, the decoder is created for the first frame of the stream.
+
+        Args:
+            image_data (_ImageData): Unpacked image data.
+            event (str): Event name.
+            error_event (str): Error event name.
+            sid (str, optional): Namespace sid - only on the server side.
+
+        Returns:
+            Decoded frame or None on error.
+        """
+
+        timestamp = image_data.timestamp
+        decoder_id = (self.get_client_eio_sid(sid, DATA_NAMESPACE), event)
+        decoder = self._decoders.get(decoder_id)
+        if decoder is None:
+            if image_data.width is None or image_data.height is None:
+                logger.error("Data does not contain width or height, it is mandatory for H.264.")
                 self.send_data(
                     {
                         "timestamp": timestamp,
-                        "error": f"Received frame with older timestamp: {timestamp}, "
-                        f"last_timestamp: {last_timestamp}, diff: {timestamp - last_timestamp}",
+                        "error": "Data does not contain width or height, it is mandatory for H.264.",
                     },
-                    self._callbacks_info[event].error_event,
+                    error_event,
                     sid=sid,
                 )
                 return None
-            self._decoders[decoder_id].last_timestamp = timestamp
-
-        if decoder_id in self._decoders:
             try:
-                frame_decoded = self._decoders[decoder_id].decode_packet_data(data["frame"])
-            except H264DecoderError as e:
-                logger.error(f"H.264 decoder error: {e}")
-                # Try to recreate decoder
-                if self._decoders[decoder_id].get_init_count() < self._recreate_h264_attempts_count:
-                    logger.info(f"Try to recreate decoder ... attempt {self._decoders[decoder_id].get_init_count()}")
-                    self._decoders[decoder_id].decoder_init()
-                self.send_data(
-                    {"timestamp": timestamp, "error": f"H.264 decoder error: {e}"},
-                    self._callbacks_info[event].error_event,
-                    sid=sid,
-                )
-                return None
-        else:
-            try:
-                frame_decoded = cv2.imdecode(np.frombuffer(data["frame"], dtype=np.uint8), cv2.IMREAD_COLOR)
+                logger.info(f"Creating H.264 decoder for image size {image_data.width}x{image_data.height}")
+                decoder = H264Decoder(image_data.width, image_data.height)
+                self._decoders[decoder_id] = decoder
             except Exception as e:
-                logger.error(f"Failed to decode frame data: {repr(e)}")
+                logger.error(f"Cannot create H.264 decoder: {repr(e)}")
                 self.send_data(
-                    {"timestamp": timestamp, "error": f"Failed to decode frame data: {repr(e)}"},
-                    self._callbacks_info[event].error_event,
+                    {"timestamp": timestamp, "error": f"Cannot create H.264 decoder: {repr(e)}"},
+                    error_event,
                     sid=sid,
                 )
                 return None
 
-        decoded_data = {"frame": frame_decoded, "timestamp": timestamp}
-        if "metadata" in data:
-            decoded_data["metadata"] = data["metadata"]
+        last_timestamp = decoder.last_timestamp
+        if timestamp - last_timestamp < 0:
+            logger.error(
+                f"Received frame with older timestamp: {timestamp}, "
+                f"last_timestamp: {last_timestamp}, diff: {timestamp - last_timestamp}"
+            )
+            self.send_data(
+                {
+                    "timestamp": timestamp,
+                    "error": f"Received frame with older timestamp: {timestamp}, "
+                    f"last_timestamp: {last_timestamp}, diff: {timestamp - last_timestamp}",
+                },
+                error_event,
+                sid=sid,
+            )
+            return None
+        decoder.last_timestamp = timestamp
+
+        try:
+            return decoder.decode_packet_data(image_data.frame)
+        except H264DecoderError as e:
+            logger.error(f"H.264 decoder error: {e}")
+            # Try to recreate decoder
+            if decoder.get_init_count() < self._recreate_h264_attempts_count:
+                logger.info(f"Try to recreate decoder ... attempt {decoder.get_init_count()}")
+                decoder.decoder_init()
+            self.send_data(
+                {"timestamp": timestamp, "error": f"H.264 decoder error: {e}"},
+                error_event,
+                sid=sid,
+            )
+            return None
+
+    def _decode_jpeg_frame(
+        self, image_data: _ImageData, event: str, error_event: str, sid: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        """Decode JPEG frame.
+
+        Args:
+            image_data (_ImageData): Unpacked image data.
+            event (str): Event name.
+            error_event (str): Error event name.
+            sid (str, optional): Namespace sid - only on the server side.
+
+        Returns:
+            Decoded frame or None on error.
+        """
 
-        return decoded_data
+        try:
+            frame_decoded: np.ndarray
+            if simplejpeg is not None:
+                # Decoded directly from the received buffer, fast DCT and upsampling like on the encoder side.
+                frame_decoded = simplejpeg.decode_jpeg(
+                    image_data.frame, colorspace="BGR", fastdct=True, fastupsample=True
+                )
+            else:
+                frame_decoded = cv2.imdecode(np.frombuffer(image_data.frame, dtype=np.uint8), cv2.IMREAD_COLOR)
+            return frame_decoded
+        except Exception as e:
+            logger.error(f"Failed to decode frame data: {repr(e)}")
+            self.send_data(
+                {"timestamp": image_data.timestamp, "error": f"Failed to decode frame data: {repr(e)}"},
+                error_event,
+                sid=sid,
+            )
+            return None
 
     def data_lz4_decode(self, data: bytes, event: str, sid: Optional[str] = None) -> Optional[Dict]:
         """Decode LZ4 compressed general JSON data received on DATA_NAMESPACE.
@@ -391,10 +881,9 @@ class Channels(ABC):
             sid (str, optional): Namespace sid - only on the server side.
         """
 
-        assert isinstance(data, bytes)
-
+        # Data which are not bytes fail in decompress and are reported as decode error.
         try:
-            new_data: Dict = ujson.loads(decompress(data))
+            new_data: Dict = orjson.loads(decompress(data))
             return new_data
         except Exception as e:
             logger.error(f"Failed to decode LZ4 JSON data: {repr(e)}")
@@ -405,10 +894,40 @@ class Channels(ABC):
             )
             return None
 
+    def data_zstd_decode(self, data: bytes, event: str, sid: Optional[str] = None) -> Optional[Dict]:
+        """Decode Zstandard compressed general JSON data received on DATA_NAMESPACE.
+
+        Args:
+            data (bytes): Zstandard compressed JSON data.
+            event (str): Event name.
+            sid (str, optional): Namespace sid - only on the server side.
+        """
+
+        assert self._zstd_decompressor is not None
+        try:
+            with self._zstd_decompressor_lock:
+                data_decompressed = self._zstd_decompressor.decompress(data)
+            new_data: Dict = orjson.loads(data_decompressed)
+            return new_data
+        except Exception as e:
+            logger.error(f"Failed to decode Zstandard JSON data: {repr(e)}")
+            self.send_data(
+                {"error": f"Failed to decode Zstandard JSON data: {repr(e)}"},
+                self._callbacks_info[event].error_event,
+                sid=sid,
+            )
+            return None
+
     @property
     def stats(self):
         return self._stats
 
     @property
-    def sizes(self):
+    def sizes(self) -> Union[List[int], Deque[int]]:
+        """Output data sizes (with stats enabled).
+
+        All sizes in a list, or only the latest stats_window sizes in a collections.deque (no slicing) when
+        stats_window is set.
+        """
+
         return self._sizes
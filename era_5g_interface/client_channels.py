@@ -1,9 +1,18 @@
 import logging
-from typing import Any, Callable, Dict, Optional
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import socketio
 
-from era_5g_interface.channels import DATA_ERROR_EVENT, DATA_NAMESPACE, CallbackInfoClient, Channels, ChannelType
+from era_5g_interface.channels import (
+    DATA_ERROR_EVENT,
+    DATA_NAMESPACE,
+    IMAGE_BATCH_EVENT_SUFFIX,
+    CallbackInfoClient,
+    Channels,
+    ChannelType,
+)
+from era_5g_interface.exceptions import BackPressureException
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +24,7 @@ class ClientChannels(Channels):
     """
 
     _callbacks_info: Dict[str, CallbackInfoClient]
+    _sio: socketio.Client
 
     def __init__(
         self,
@@ -32,37 +42,107 @@ class ClientChannels(Channels):
             back_pressure_size (int, optional): Back pressure size - max size of eio.queue.qsize().
             recreate_h264_attempts_count (int): How many times try to recreate the H.264 encoder/decoder.
             stats (bool): Store output data sizes.
+            stats_window (int, optional): Max number of stored (latest) output data sizes, default: None (all).
+            jpeg_quality (int): ChannelType.JPEG quality (0-100), default: 95.
+            h264_codec (str): FFmpeg H.264 encoder used for sending, e.g. "h264" or "h264_nvenc", default: "h264".
+            image_batch_size (int): Max number of droppable (non-key) frames sent by send_image in one message,
+                default: 1 (no batching).
+            image_batch_timeout (float): Max time in seconds a frame waits in an unfinished batch, default: 0.01.
         """
 
         super().__init__(sio, callbacks_info, **kwargs)
 
         self._disconnect_callback = disconnect_callback
 
-        self._sio.on(DATA_ERROR_EVENT, lambda data: self.data_error_callback(data), namespace=DATA_NAMESPACE)
+        self._sio.on(DATA_ERROR_EVENT, self.data_error_callback, namespace=DATA_NAMESPACE)
 
+        # Socketio calls the handler with received data as the only positional argument, the event name is bound by
+        # partial (no lambda frame per received message).
         for event, callback_info in self._callbacks_info.items():
             logger.info(f"Creating client channels callback, type: {callback_info.type}, event: '{event}'")
             if callback_info.type is ChannelType.JSON:
                 self._sio.on(
                     event,
-                    lambda data, local_event=event: self.json_callback(data, local_event),
+                    partial(self.json_callback, event=event),
                     namespace=DATA_NAMESPACE,
                 )
             elif callback_info.type is ChannelType.JSON_LZ4:
                 self._sio.on(
                     event,
-                    lambda data, local_event=event: self.json_lz4_callback(data, local_event),
+                    partial(self.json_lz4_callback, event=event),
                     namespace=DATA_NAMESPACE,
                 )
-            elif callback_info.type in (ChannelType.JPEG, ChannelType.H264):
+            elif callback_info.type is ChannelType.JSON_ZSTD:
                 self._sio.on(
                     event,
-                    lambda data, local_event=event: self.image_callback(data, local_event),
+                    partial(self.json_zstd_callback, event=event),
+                    namespace=DATA_NAMESPACE,
+                )
+            elif callback_info.type in (ChannelType.JPEG, ChannelType.H264, ChannelType.H264_BIN):
+                self._sio.on(
+                    event,
+                    partial(self.image_callback, event=event),
+                    namespace=DATA_NAMESPACE,
+                )
+                self._sio.on(
+                    event + IMAGE_BATCH_EVENT_SUFFIX,
+                    partial(self.image_batch_callback, event=event),
                     namespace=DATA_NAMESPACE,
                 )
             else:
                 raise ValueError(f"Unknown channel type: {callback_info.type}")
 
+    def _apply_back_pressure(self, sid: Optional[str] = None) -> None:
+        """Apply back pressure.
+
+        Args:
+            sid (str, optional): Not used on the client side.
+
+        Raises:
+            BackPressureException: If the output queue size exceeds back_pressure_size.
+        """
+
+        if self._sio.eio.queue.qsize() > self._back_pressure_size:
+            raise BackPressureException()
+
+    def _emit(
+        self,
+        event: str,
+        data: Union[Dict[str, Any], bytes, List[Union[Dict[str, Any], bytes]]],
+        sid: Optional[str] = None,
+        wait_for_reconnection: bool = True,
+    ) -> None:
+        """Emit data to the server via DATA_NAMESPACE.
+
+        Args:
+            event (str): Event name.
+            data (Union[Dict[str, Any], bytes, List[Union[Dict[str, Any], bytes]]]): JSON data, binary payload or
+                image batch.
+            sid (str, optional): Not used on the client side.
+            wait_for_reconnection (bool): Wait for reconnection to server side? Wait is blocking.
+        """
+
+        if wait_for_reconnection and (not self._sio.connected or not self._sio.eio.state):
+            # Block until the socketio reconnect task finishes (reconnected or gave up), like socketio.Client.wait().
+            reconnect_task = self._sio._reconnect_task
+            if reconnect_task and reconnect_task.is_alive():
+                logger.info("Waiting for reconnection ...")
+                reconnect_task.join()
+        self._sio.emit(event, data, namespace=DATA_NAMESPACE)
+
+    def get_client_eio_sid(self, sid: Optional[str] = None, namespace: Optional[str] = None) -> str:
+        """Get client eio sid.
+
+        Args:
+            sid (str, optional): Not used on the client side.
+            namespace (str, optional): Not used on the client side.
+
+        Returns:
+            Client eio sid.
+        """
+
+        return str(self._sio.sid)
+
     def json_callback(self, data: Dict[str, Any], event: str) -> None:
         """Allows to receive general JSON data on DATA_NAMESPACE.
 
@@ -92,11 +172,23 @@ class ClientChannels(Channels):
         if decoded_data:
             self.json_callback(decoded_data, event)
 
-    def image_callback(self, data: Dict[str, Any], event: str) -> None:
+    def json_zstd_callback(self, data: bytes, event: str) -> None:
+        """Allows to receive Zstandard compressed general JSON data on DATA_NAMESPACE.
+
+        Args:
+            data (bytes): Zstandard compressed JSON data.
+            event (str): Event name.
+        """
+
+        decoded_data = super().data_zstd_decode(data, event)
+        if decoded_data:
+            self.json_callback(decoded_data, event)
+
+    def image_callback(self, data: Union[Dict[str, Any], bytes], event: str) -> None:
         """Allows to receive JPEG or H.264 encoded image on DATA_NAMESPACE.
 
         Args:
-            data (Dict[str, Any]): Received dictionary with frame data.
+            data (Union[Dict[str, Any], bytes]): Received dictionary with frame data or ChannelType.H264_BIN payload.
             event (str): Event name.
         """
 
@@ -110,3 +202,14 @@ class ClientChannels(Channels):
                 if self._disconnect_callback:
                     self._disconnect_callback()
                 Channels._shutdown("image", event)
+
+    def image_batch_callback(self, data: List[Union[Dict[str, Any], bytes]], event: str) -> None:
+        """Allows to receive batch of JPEG or H.264 encoded images on DATA_NAMESPACE.
+
+        Args:
+            data (List[Union[Dict[str, Any], bytes]]): Received list of image data.
+            event (str): Event name.
+        """
+
+        for image_data in data:
+            self.image_callback(image_data, event)
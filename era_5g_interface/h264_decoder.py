@@ -1,5 +1,7 @@
 import logging
+from typing import Optional, Union
 
+import cv2
 import numpy as np
 from av.codec import CodecContext
 from av.error import FFmpegError, tag_to_code
@@ -96,12 +98,17 @@ class H264Decoder:
 
         return self._last_frame_is_keyframe
 
-    def decode_packet_data(self, packet_data: bytes, format: str = "bgr24") -> np.ndarray:
+    def decode_packet_data(
+        self, packet_data: Union[bytes, memoryview], format: str = "bgr24", dst: Optional[np.ndarray] = None
+    ) -> np.ndarray:
         """Decode H.264 packets bytes to ndarray.
 
         Args:
-            packet_data (bytes): Packet data.
+            packet_data (Union[bytes, memoryview]): Packet data, memoryview avoids a copy of the sliced payload.
             format (str): Image format.
+            dst (np.ndarray, optional): Caller-owned output array (height x width x 3, uint8) for the "bgr24" format,
+                it is filled and returned instead of a new array (yuv420p frames with even size only). The caller must
+                not keep references to the previous frame. Default: None (new array for each frame).
 
         Returns:
             Video frame / image.
@@ -127,7 +134,17 @@ class H264Decoder:
                 # frame.to_image().save('output/frame-%04d.jpg' % frame.index)
 
                 self._last_frame_is_keyframe = frame.key_frame
-                frame_ndarray: np.ndarray = frame.to_ndarray(format=format)
+                frame_ndarray: np.ndarray
+                if (
+                    format == "bgr24"
+                    and frame.format.name == self._pix_fmt
+                    and frame.width % 2 == 0
+                    and frame.height % 2 == 0
+                ):
+                    # SIMD OpenCV conversion from yuv420p planes, faster than the libswscale conversion in PyAV.
+                    frame_ndarray = cv2.cvtColor(frame.to_ndarray(), cv2.COLOR_YUV2BGR_I420, dst=dst)
+                else:
+                    frame_ndarray = frame.to_ndarray(format=format)
                 return frame_ndarray
             # Sometimes, with dropping some TCP packets, no frame is decoded from av.Packet while no FFmpegError is
             # raised. This is resolved by throwing this exception.
@@ -1,6 +1,7 @@
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
+import cv2
 import numpy as np
 from av.codec import CodecContext
 from av.error import FFmpegError
@@ -20,11 +21,24 @@ class H264EncoderError(Exception):
 
 logger = logging.getLogger("H.264 encoder")
 
+# Default options for supported H.264 encoders (FFmpeg codec names), libx264 software encoder is used for "h264".
+DEFAULT_OPTIONS: Dict[str, Dict[str, str]] = {
+    "h264": {"preset": "ultrafast", "tune": "zerolatency"},
+    "h264_nvenc": {"preset": "p5", "tune": "ull", "zerolatency": "1"},
+}
+
 
 class H264Encoder:
     """H.264 Encoder."""
 
-    def __init__(self, width: int, height: int, fps: float = 30, options: Optional[Dict[str, str]] = None) -> None:
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        fps: float = 30,
+        options: Optional[Dict[str, str]] = None,
+        codec: str = "h264",
+    ) -> None:
         """Constructor.
 
         Args:
@@ -32,12 +46,14 @@ class H264Encoder:
             height (int): Video frame height.
             fps (float): Video framerate (FPS), default: 30.
             options (Dict[str, str], optional): H264 options, e.g. {"crf": "0", "preset": "ultrafast",
-                "tune": "zerolatency", "x264-params": "keyint=5"}, default: {"preset": "ultrafast",
-                "tune": "zerolatency"}.
+                "tune": "zerolatency", "x264-params": "keyint=5"}, default: DEFAULT_OPTIONS for the codec, i.e.
+                {"preset": "ultrafast", "tune": "zerolatency"} for "h264".
+            codec (str): FFmpeg H.264 encoder name, e.g. "h264" (libx264) or "h264_nvenc" (NVIDIA GPU encoder,
+                requires FFmpeg with NVENC support), default: "h264".
         """
 
         if options is None:
-            options = {"preset": "ultrafast", "tune": "zerolatency"}
+            options = DEFAULT_OPTIONS.get(codec, {})
 
         # TODO: only for testing purpose
         # options = {"crf": "0", "preset": "ultrafast", "tune": "zerolatency"}
@@ -48,8 +64,13 @@ class H264Encoder:
         self._width = width
         self._height = height
         self._options = options
+        self._codec = codec
         self._pix_fmt = "yuv420p"
-        self._encoder: VideoCodecContext = CodecContext.create("h264", "w")
+        # Persistent I420 buffer for the BGR conversion, it is used only for even frame sizes (I420 requirement).
+        self._yuv_frame_data: Optional[np.ndarray] = None
+        if width % 2 == 0 and height % 2 == 0:
+            self._yuv_frame_data = np.empty((height * 3 // 2, width), dtype=np.uint8)
+        self._encoder: VideoCodecContext = CodecContext.create(self._codec, "w")
         self._init_count = 0
         self.last_timestamp: int = 0
         self._last_frame_is_keyframe = False
@@ -86,7 +107,7 @@ class H264Encoder:
         """Init H.264 encoder."""
 
         self._init_count += 1
-        self._encoder = CodecContext.create("h264", "w")
+        self._encoder = CodecContext.create(self._codec, "w")
         self._encoder.width = self._width
         self._encoder.height = self._height
         self._encoder.framerate = self._fps
@@ -123,13 +144,24 @@ class H264Encoder:
         """
 
         try:
-            frame = VideoFrame.from_ndarray(frame_data, format=format)
+            if (
+                format == "bgr24"
+                and self._yuv_frame_data is not None
+                and frame_data.shape == (self._height, self._width, 3)
+                and frame_data.dtype == np.uint8
+            ):
+                # SIMD OpenCV conversion to the encoder pixel format (yuv420p) into the persistent buffer, it replaces
+                # the libswscale conversion inside the encoder.
+                cv2.cvtColor(frame_data, cv2.COLOR_BGR2YUV_I420, dst=self._yuv_frame_data)
+                frame = VideoFrame.from_ndarray(self._yuv_frame_data, format=self._pix_fmt)
+            else:
+                frame = VideoFrame.from_ndarray(frame_data, format=format)
             # TODO: only for testing purpose
             # frame.to_image().save('input/frame-%04d.jpg' % self.frame_id)
             # self.frame_id += 1
 
             self._last_frame_is_keyframe = False
-            packets = []
+            packets: List[Packet] = []
             packet: Packet
             for packet in self._encoder.encode(frame):
                 # TODO: only for testing purpose
@@ -142,10 +174,13 @@ class H264Encoder:
                 # )
                 if packet.is_keyframe:
                     self._last_frame_is_keyframe = True
-                packets.append(bytes(packet))
+                packets.append(packet)
 
+            if len(packets) == 1:
+                return bytes(packets[0])
             if len(packets) > 1:
                 logger.info(f"Frame {frame} encoded to multiple packets: {packets}")
+            # Packets support the buffer protocol, so they are copied only once into the joined bytes.
             return b"".join(packets)
         except FFmpegError as e:
             raise H264EncoderError(e)
@@ -1,9 +1,17 @@
 import logging
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import socketio
 
-from era_5g_interface.channels import DATA_ERROR_EVENT, DATA_NAMESPACE, CallbackInfoServer, Channels, ChannelType
+from era_5g_interface.channels import (
+    DATA_ERROR_EVENT,
+    DATA_NAMESPACE,
+    IMAGE_BATCH_EVENT_SUFFIX,
+    CallbackInfoServer,
+    Channels,
+    ChannelType,
+)
+from era_5g_interface.exceptions import BackPressureException
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +23,7 @@ class ServerChannels(Channels):
     """
 
     _callbacks_info: Dict[str, CallbackInfoServer]
+    _sio: socketio.Server
 
     def __init__(
         self,
@@ -31,11 +40,21 @@ class ServerChannels(Channels):
             back_pressure_size (int, optional): Back pressure size - max size of eio.queue.qsize().
             recreate_h264_attempts_count (int): How many times try to recreate the H.264 encoder/decoder.
             stats (bool): Store output data sizes.
+            stats_window (int, optional): Max number of stored (latest) output data sizes, default: None (all).
+            jpeg_quality (int): ChannelType.JPEG quality (0-100), default: 95.
+            h264_codec (str): FFmpeg H.264 encoder used for sending, e.g. "h264" or "h264_nvenc", default: "h264".
+            image_batch_size (int): Max number of droppable (non-key) frames sent by send_image in one message,
+                default: 1 (no batching).
+            image_batch_timeout (float): Max time in seconds a frame waits in an unfinished batch, default: 0.01.
         """
 
         super().__init__(sio, callbacks_info, **kwargs)
 
         self._disconnect_callback = disconnect_callback
+        # Engineio sockets used for back pressure, indexed by DATA_NAMESPACE sid. The entry is resolved again when the
+        # socket is closed (client reconnected or disconnected), closed entries of other clients are removed then too.
+        # The server can also remove the entry of a disconnected client with forget_sid.
+        self._back_pressure_sockets: Dict[str, Any] = dict()
 
         self._sio.on(DATA_ERROR_EVENT, lambda sid, data: self.data_error_callback(data, sid), namespace=DATA_NAMESPACE)
 
@@ -53,15 +72,102 @@ class ServerChannels(Channels):
                     lambda sid, data, local_event=event: self.json_lz4_callback(data, local_event, sid),
                     namespace=DATA_NAMESPACE,
                 )
-            elif callback_info.type in (ChannelType.JPEG, ChannelType.H264):
+            elif callback_info.type is ChannelType.JSON_ZSTD:
+                self._sio.on(
+                    event,
+                    lambda sid, data, local_event=event: self.json_zstd_callback(data, local_event, sid),
+                    namespace=DATA_NAMESPACE,
+                )
+            elif callback_info.type in (ChannelType.JPEG, ChannelType.H264, ChannelType.H264_BIN):
                 self._sio.on(
                     event,
                     lambda sid, data, local_event=event: self.image_callback(data, local_event, sid),
                     namespace=DATA_NAMESPACE,
                 )
+                self._sio.on(
+                    event + IMAGE_BATCH_EVENT_SUFFIX,
+                    lambda sid, data, local_event=event: self.image_batch_callback(data, local_event, sid),
+                    namespace=DATA_NAMESPACE,
+                )
             else:
                 raise ValueError(f"Unknown channel type: {callback_info.type}")
 
+    def _apply_back_pressure(self, sid: Optional[str] = None) -> None:
+        """Apply back pressure.
+
+        Args:
+            sid (str, optional): Namespace sid - mandatory on the server side.
+
+        Raises:
+            BackPressureException: If the output queue size exceeds back_pressure_size.
+        """
+
+        if sid is None:
+            raise ValueError("'sid' has to be set for server.")
+        eio_socket = self._back_pressure_sockets.get(sid)
+        if eio_socket is None or eio_socket.closed:
+            # Remove the stale entries (including this sid) before resolving, so the sockets of disconnected clients
+            # (and their unsent packets) are not kept. Sending threads can modify the cache at the same time, so a copy
+            # of the items is iterated and entries already removed by another thread are ignored.
+            for stale_sid, cached in list(self._back_pressure_sockets.items()):
+                if cached.closed:
+                    self._back_pressure_sockets.pop(stale_sid, None)
+            eio_sid = self.get_client_eio_sid(sid, DATA_NAMESPACE)
+            eio_socket = self._sio.eio.sockets[eio_sid]
+            self._back_pressure_sockets[sid] = eio_socket
+        if eio_socket.queue.qsize() > self._back_pressure_size:
+            raise BackPressureException()
+
+    def _emit(
+        self,
+        event: str,
+        data: Union[Dict[str, Any], bytes, List[Union[Dict[str, Any], bytes]]],
+        sid: Optional[str] = None,
+        wait_for_reconnection: bool = True,
+    ) -> None:
+        """Emit data to the client via DATA_NAMESPACE.
+
+        Args:
+            event (str): Event name.
+            data (Union[Dict[str, Any], bytes, List[Union[Dict[str, Any], bytes]]]): JSON data, binary payload or
+                image batch.
+            sid (str, optional): Namespace sid - mandatory on the server side.
+            wait_for_reconnection (bool): Not used on the server side.
+        """
+
+        if sid is None:
+            raise ValueError("'sid' has to be set for server.")
+        if not self._sio.manager.is_connected(sid, DATA_NAMESPACE):
+            self._back_pressure_sockets.pop(sid, None)
+            raise ConnectionError(f"Client with {DATA_NAMESPACE} sid {sid} is not connected to server.")
+        self._sio.emit(event, data, namespace=DATA_NAMESPACE, to=sid)
+
+    def forget_sid(self, sid: str) -> None:
+        """Remove cached data of the client, e.g. on its disconnection.
+
+        It can be called from the disconnect handler of the server application.
+
+        Args:
+            sid (str): Namespace sid.
+        """
+
+        self._back_pressure_sockets.pop(sid, None)
+
+    def get_client_eio_sid(self, sid: Optional[str] = None, namespace: Optional[str] = None) -> str:
+        """Get client eio sid.
+
+        Args:
+            sid (str, optional): Namespace sid - mandatory on the server side.
+            namespace (str, optional): Namespace - mandatory on the server side.
+
+        Returns:
+            Client eio sid.
+        """
+
+        if sid is None:
+            raise ValueError("'sid' has to be set for server.")
+        return str(self._sio.manager.eio_sid_from_sid(sid, namespace))
+
     def json_callback(self, data: Dict[str, Any], event: str, sid: str) -> None:
         """Allows to receive general JSON data on DATA_NAMESPACE.
 
@@ -93,11 +199,24 @@ class ServerChannels(Channels):
         if decoded_data:
             self.json_callback(decoded_data, event, sid)
 
-    def image_callback(self, data: Dict[str, Any], event: str, sid: str) -> None:
+    def json_zstd_callback(self, data: bytes, event: str, sid: str) -> None:
+        """Allows to receive Zstandard compressed general JSON data on DATA_NAMESPACE.
+
+        Args:
+            data (bytes): Zstandard compressed JSON data.
+            event (str): Event name.
+            sid (str, optional): Namespace sid - only on the server side.
+        """
+
+        decoded_data = super().data_zstd_decode(data, event, sid)
+        if decoded_data:
+            self.json_callback(decoded_data, event, sid)
+
+    def image_callback(self, data: Union[Dict[str, Any], bytes], event: str, sid: str) -> None:
         """Allows to receive JPEG or H.264 encoded image on DATA_NAMESPACE.
 
         Args:
-            data (Dict[str, Any]): Received dictionary with frame data.
+            data (Union[Dict[str, Any], bytes]): Received dictionary with frame data or ChannelType.H264_BIN payload.
             event (str): Event name.
             sid (str, optional): Namespace sid - only on the server side.
         """
@@ -112,3 +231,15 @@ class ServerChannels(Channels):
                 if self._disconnect_callback:
                     self._disconnect_callback(sid, DATA_NAMESPACE)
                 Channels._shutdown("image", event)
+
+    def image_batch_callback(self, data: List[Union[Dict[str, Any], bytes]], event: str, sid: str) -> None:
+        """Allows to receive batch of JPEG or H.264 encoded images on DATA_NAMESPACE.
+
+        Args:
+            data (List[Union[Dict[str, Any], bytes]]): Received list of image data.
+            event (str): Event name.
+            sid (str, optional): Namespace sid - only on the server side.
+        """
+
+        for image_data in data:
+            self.image_callback(image_data, event, sid)
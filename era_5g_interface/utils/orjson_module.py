@@ -0,0 +1,39 @@
+"""Orjson based JSON module for python-socketio.
+
+It can be passed to the Socketio Client or Server object as an alternative JSON module, e.g.
+socketio.Client(json=orjson_module), and used for encoding/decoding of ChannelType.JSON packets.
+"""
+
+from typing import Any
+
+import orjson
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj: Any, *args, **kwargs) -> str:
+    """Serialize obj to a JSON formatted str.
+
+    Other arguments (e.g. separators) are ignored, orjson output is always compact.
+
+    Args:
+        obj (Any): Object to serialize.
+
+    Returns:
+        JSON formatted str.
+    """
+
+    return orjson.dumps(obj, option=OPTIONS).decode("utf-8")
+
+
+def loads(s: Any, *args, **kwargs) -> Any:
+    """Deserialize s (str, bytes or bytearray) to a Python object.
+
+    Args:
+        s (Any): JSON document.
+
+    Returns:
+        Python object.
+    """
+
+    return orjson.loads(s)
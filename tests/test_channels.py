@@ -1,20 +1,33 @@
+import gc
 import logging
 import os
 import socket
 import time
 from contextlib import closing
+from functools import partial
 from threading import Event, Thread
-from typing import Dict
+from typing import Dict, List, Tuple, Union
 from unittest import mock
 
+import numpy as np
 import pytest
 import socketio
 from flask import Flask
 
-from era_5g_interface.channels import DATA_NAMESPACE, CallbackInfoClient, CallbackInfoServer, ChannelType
+from era_5g_interface import channels
+from era_5g_interface.channels import (
+    DATA_NAMESPACE,
+    IMAGE_HEADER,
+    IMAGE_HEADER_KEY_FRAME_FLAG,
+    CallbackInfoClient,
+    CallbackInfoServer,
+    ChannelType,
+    DecodedFrame,
+)
 from era_5g_interface.client_channels import ClientChannels
 from era_5g_interface.exceptions import BackPressureException
 from era_5g_interface.server_channels import ServerChannels
+from era_5g_interface.utils import orjson_module
 
 
 def find_free_port():
@@ -24,8 +37,17 @@ def find_free_port():
         return s.getsockname()[1]
 
 
+@pytest.fixture()
+def orjson_packets(monkeypatch: pytest.MonkeyPatch) -> None:
+    # socketio.Client(json=...) replaces the JSON module of the packet classes for the whole process (including the
+    # in-process test server), the original modules are restored after the test.
+    monkeypatch.setattr(socketio.packet.Packet, "json", socketio.packet.Packet.json)
+    engineio_packet = socketio.client.engineio.packet.Packet  # engineio is not a direct requirement
+    monkeypatch.setattr(engineio_packet, "json", engineio_packet.json)
+
+
 @pytest.mark.timeout(10)
-def test_channels() -> None:
+def test_channels(orjson_packets: None) -> None:
     port = find_free_port()
     sio = socketio.Server()
     os._exit = mock.MagicMock()
@@ -44,30 +66,27 @@ def test_channels() -> None:
     test_data = {"test": "data"}
     server_got_data = Event()
 
-    def server_json_callback(sid: str, data: Dict) -> None:
+    def server_json_callback(sid: str, data: Union[Dict, DecodedFrame]) -> None:
         assert data == test_data
         server_got_data.set()
 
-    def server_json_exc_callback(sid: str, data: Dict) -> None:
+    def server_json_exc_callback(sid: str, data: Union[Dict, DecodedFrame]) -> None:
         raise Exception("Boom from server!")
 
-    def client_json_callback(data: Dict) -> None:
+    def client_json_callback(data: Union[Dict, DecodedFrame]) -> None:
         pass
 
-    def client_json_exc_callback(data: Dict) -> None:
+    def client_json_exc_callback(data: Union[Dict, DecodedFrame]) -> None:
         raise Exception("Boom from client!")
 
-    server = ServerChannels(
-        sio,
-        {
-            "test": CallbackInfoServer(ChannelType.JSON, server_json_callback),
-            "test_lz4": CallbackInfoServer(ChannelType.JSON_LZ4, server_json_callback),
-            "test_exception": CallbackInfoServer(ChannelType.JSON, server_json_exc_callback),
-        },
-        disconnect_callback=None,
-    )
+    server_callbacks_info = {
+        "test": CallbackInfoServer(ChannelType.JSON, server_json_callback),
+        "test_lz4": CallbackInfoServer(ChannelType.JSON_LZ4, server_json_callback),
+        "test_exception": CallbackInfoServer(ChannelType.JSON, server_json_exc_callback),
+    }
+    server = ServerChannels(sio, server_callbacks_info, disconnect_callback=None)
 
-    client = socketio.Client()
+    client = socketio.Client(json=orjson_module)  # used by the server too (process-wide)
     time.sleep(1)  # not sure why wait_timeout is not enough
     client.connect(f"http://localhost:{port}", wait_timeout=5, namespaces=[DATA_NAMESPACE])
 
@@ -94,6 +113,13 @@ def test_channels() -> None:
     assert server_got_data.wait(1)
     server_got_data.clear()
 
+    # back pressure check on the server side (queue is resolved and cached for the sid)
+    for _ in range(2):
+        server.send_data(test_data, "test", sid=client.get_sid(DATA_NAMESPACE), can_be_dropped=True)
+    # the cached queue is resolved again after it is forgotten
+    server.forget_sid(client.get_sid(DATA_NAMESPACE))
+    server.send_data(test_data, "test", sid=client.get_sid(DATA_NAMESPACE), can_be_dropped=True)
+
     # test exception handling in server callback
     client_ch.send_data(test_data, "test_exception", channel_type=ChannelType.JSON)
     assert not server_got_data.wait(1)
@@ -106,3 +132,178 @@ def test_channels() -> None:
     server.send_data(test_data, "test_exception", channel_type=ChannelType.JSON, sid=client.get_sid(DATA_NAMESPACE))
     assert not server_got_data.wait(1)
     assert os._exit.called
+
+
+@pytest.mark.timeout(20)
+def test_image_channels() -> None:
+    port = find_free_port()
+    sio = socketio.Server()
+    os._exit = mock.MagicMock()
+
+    def thread_flask() -> None:
+        app = Flask(__name__)
+        app.wsgi_app = socketio.WSGIApp(sio, app.wsgi_app)  # type: ignore
+
+        logging.getLogger().info("Starting Flask...")
+        app.run(port=port, host="0.0.0.0")
+
+    t = Thread(target=thread_flask)
+    t.daemon = True
+    t.start()
+
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    metadata = {"test": "metadata"}
+    server_got_data: Dict[str, Event] = {"jpeg": Event(), "h264": Event(), "h264_bin": Event()}
+    batched_frames_count = 5
+    server_batched_timestamps: List[int] = []
+    server_got_batched_data = Event()
+
+    def server_image_callback(event: str, sid: str, data: Union[Dict, DecodedFrame]) -> None:
+        assert isinstance(data, DecodedFrame)
+        assert data.frame.shape == frame.shape
+        assert data.timestamp > 0
+        assert data.metadata == metadata
+        # dict style access kept for backward compatibility
+        assert data["frame"] is data.frame
+        assert "metadata" in data
+        assert data.get("metadata") == metadata
+        assert "unknown" not in data and frame not in data
+        server_got_data[event].set()
+
+    def server_batched_image_callback(sid: str, data: Union[Dict, DecodedFrame]) -> None:
+        assert isinstance(data, DecodedFrame)
+        server_batched_timestamps.append(data.timestamp)
+        if len(server_batched_timestamps) == batched_frames_count:
+            server_got_batched_data.set()
+
+    callbacks_info = {
+        event: CallbackInfoServer(channel_type, partial(server_image_callback, event))
+        for event, channel_type in (
+            ("jpeg", ChannelType.JPEG),
+            ("h264", ChannelType.H264),
+            ("h264_bin", ChannelType.H264_BIN),
+        )
+    }
+    callbacks_info["jpeg_batched"] = CallbackInfoServer(ChannelType.JPEG, server_batched_image_callback)
+    ServerChannels(sio, callbacks_info)
+
+    client = socketio.Client()
+    time.sleep(1)  # not sure why wait_timeout is not enough
+    client.connect(f"http://localhost:{port}", wait_timeout=5, namespaces=[DATA_NAMESPACE])
+
+    client_ch = ClientChannels(client, {})
+    client_ch.send_image(frame, "jpeg", ChannelType.JPEG, metadata=metadata)
+    client_ch.send_image(frame, "h264", ChannelType.H264, metadata=metadata)
+    client_ch.send_image(frame, "h264_bin", ChannelType.H264_BIN, metadata=metadata)
+
+    for event in server_got_data.values():
+        assert event.wait(2)
+
+    # one full batch (sent immediately) and one unfinished batch (sent after image_batch_timeout)
+    batch_ch = ClientChannels(client, {}, image_batch_size=3, image_batch_timeout=0.1)
+    for timestamp in range(1, batched_frames_count + 1):
+        batch_ch.send_image(frame, "jpeg_batched", ChannelType.JPEG, timestamp=timestamp, can_be_dropped=True)
+    assert server_got_batched_data.wait(2)
+    assert sorted(server_batched_timestamps) == list(range(1, batched_frames_count + 1))
+
+
+@pytest.mark.timeout(10)
+def test_image_batch_back_pressure() -> None:
+    client = mock.MagicMock()
+    # the first back pressure check (flush of frames 2 and 3 before the key frame 4) fails
+    client.eio.queue.qsize.side_effect = [100] + [0] * 10
+    client_ch = ClientChannels(client, {}, back_pressure_size=5, image_batch_size=3, image_batch_timeout=10)
+
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    options = {"preset": "ultrafast", "tune": "zerolatency", "x264-params": "keyint=3"}
+    for timestamp in range(1, 7):
+        frame[:] = timestamp
+        client_ch.send_image(frame, "h264_bin", ChannelType.H264_BIN, timestamp=timestamp, encoding_options=options)
+    client_ch.flush_image_batch("h264_bin")
+
+    sent_frames = []
+    for emit_call in client.emit.call_args_list:
+        payloads = emit_call.args[1] if emit_call.args[0] == "h264_bin_batch" else [emit_call.args[1]]
+        sent_frames += [IMAGE_HEADER.unpack_from(payload, 0) for payload in payloads]
+    sent_timestamps = [timestamp for timestamp, _, _, _, _ in sent_frames]
+    key_frames = [timestamp for timestamp, _, _, flags, _ in sent_frames if flags & IMAGE_HEADER_KEY_FRAME_FLAG]
+    # the batch with frames 2 and 3 is dropped, the key frame after it is sent anyway
+    assert sent_timestamps == [1, 4, 5, 6]
+    assert key_frames == [1, 4]
+
+
+def test_image_batch_metadata() -> None:
+    client = mock.MagicMock()
+    client_ch = ClientChannels(client, {}, back_pressure_size=None, image_batch_size=3, image_batch_timeout=10)
+
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    metadata = {"n": 0}
+    for n in range(3):
+        metadata["n"] = n  # the same dict is modified before the batch is sent
+        client_ch.send_image(frame, "jpeg", ChannelType.JPEG, timestamp=n + 1, metadata=metadata)
+
+    (emit_call,) = client.emit.call_args_list
+    assert emit_call.args[0] == "jpeg_batch"
+    assert [data["metadata"] for data in emit_call.args[1]] == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+
+@pytest.mark.timeout(10)
+def test_image_batch_flusher_stop() -> None:
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    def start_flusher() -> Tuple[ClientChannels, Thread]:
+        client_ch = ClientChannels(mock.MagicMock(), {}, back_pressure_size=None, image_batch_size=3)
+        client_ch.send_image(frame, "jpeg", ChannelType.JPEG)
+        flusher = client_ch._image_batch_flusher
+        assert flusher is not None and flusher.is_alive()
+        return client_ch, flusher
+
+    client_ch, flusher = start_flusher()
+    client_ch.close()
+    assert not flusher.is_alive()
+
+    # the flusher thread does not keep the object alive and ends with it
+    client_ch, flusher = start_flusher()
+    del client_ch
+    gc.collect()
+    flusher.join(5)
+    assert not flusher.is_alive()
+
+
+def test_json_zstd() -> None:
+    pytest.importorskip("zstandard")  # optional dependency
+    test_data = {"test": "data", "list": list(range(100))}
+    received: List[Union[Dict, DecodedFrame]] = []
+
+    sender = ClientChannels(mock.MagicMock(), {})
+    sender.send_data(test_data, "zstd", channel_type=ChannelType.JSON_ZSTD)
+    ((event, payload), _) = sender._sio.emit.call_args
+    assert event == "zstd"
+    assert isinstance(payload, bytes)
+
+    receiver = ClientChannels(mock.MagicMock(), {"zstd": CallbackInfoClient(ChannelType.JSON_ZSTD, received.append)})
+    receiver.json_zstd_callback(payload, "zstd")
+    assert received == [test_data]
+
+
+@pytest.mark.parametrize("jpeg_codec", ["simplejpeg", "cv2"])
+def test_jpeg_codec(jpeg_codec: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    if jpeg_codec == "simplejpeg":
+        pytest.importorskip("simplejpeg")  # optional dependency, used by channels when installed
+    else:
+        monkeypatch.setattr(channels, "simplejpeg", None)  # OpenCV fallback
+    received: List[Union[Dict, DecodedFrame]] = []
+
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    frame[:, :160] = 255
+    sender = ClientChannels(mock.MagicMock(), {}, back_pressure_size=None)
+    sender.send_image(frame, "jpeg", ChannelType.JPEG, timestamp=1)
+    ((_, payload), _) = sender._sio.emit.call_args
+
+    receiver = ClientChannels(mock.MagicMock(), {"jpeg": CallbackInfoClient(ChannelType.JPEG, received.append)})
+    receiver.image_callback(payload, "jpeg")
+    (decoded,) = received
+    assert isinstance(decoded, DecodedFrame)
+    assert decoded.timestamp == 1
+    assert decoded.frame.shape == frame.shape
+    assert np.abs(decoded.frame.astype(int) - frame).mean() < 2